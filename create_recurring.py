@@ -6,61 +6,320 @@ Events that are created a not recurring (which requires paid plugin), but
 will create multiple instances of the event.
 """
 
-import base64
+import calendar
+import dataclasses
+import datetime
+import functools
+import hashlib
 import html
+import json
 import logging
 import os
 import re
 import sys
+import tempfile
+import threading
 import time
 import unicodedata
+import urllib.parse
+from collections.abc import Callable, Iterable, Mapping
+from concurrent.futures import ThreadPoolExecutor
+from types import MappingProxyType
 from typing import Annotated
 
-import pendulum
 import requests
 import typer
 import yaml
 from dotenv import load_dotenv
+from requests.adapters import HTTPAdapter, Retry
+from requests.auth import HTTPBasicAuth
 from requests.exceptions import HTTPError
 from rich.console import Console
 from rich.logging import RichHandler
 
 load_dotenv()
 
-WORDPRESS_USER = os.getenv("WORDPRESS_USER")
-WORDPRESS_PASSWORD = os.getenv("WORDPRESS_PASSWORD")
-WORDPRESS_CREDS = WORDPRESS_USER + ":" + WORDPRESS_PASSWORD
-wordpress_token = base64.b64encode(WORDPRESS_CREDS.encode())
-wordpress_header = {"Authorization": "Basic " + wordpress_token.decode("utf-8")}
-
 WORDPRESS_SERVER = os.getenv("WORDPRESS_SERVER")
 CONFIG_FILE = os.getenv("CONFIG_FILE")
 EVENT_API_BASE = os.getenv("EVENT_API_BASE")
 DEFAULT_ORGANISER = os.getenv("DEFAULT_ORGANISER")
 DEFAULT_VENUE = os.getenv("DEFAULT_VENUE")
-
-summer = {8}
-
-with open(CONFIG_FILE, encoding="utf-8") as configfile:
-    # Use safe_load to prevent execution of arbitrary code
-    configdata = yaml.safe_load(configfile)
+# maximum number of events to create/update in wordpress per minute
+RATE_PER_MINUTE = int(os.getenv("RATE_PER_MINUTE", "60"))
+# where the venue, organiser, tag and category ids are kept between runs, empty to disable
+ID_CACHE_DIR = os.getenv("ID_CACHE_DIR", os.path.join(os.path.expanduser("~"), ".cache", "stmaryosevents"))
+
+# the wordpress APIs used, built once from the settings above
+EVENTS_URL = f"{WORDPRESS_SERVER}{EVENT_API_BASE}/events"
+VENUES_URL = f"{WORDPRESS_SERVER}{EVENT_API_BASE}/venues"
+ORGANIZERS_URL = f"{WORDPRESS_SERVER}{EVENT_API_BASE}/organizers"
+CATEGORIES_URL = f"{WORDPRESS_SERVER}{EVENT_API_BASE}/categories"
+TAGS_URL = f"{WORDPRESS_SERVER}/wp-json/wp/v2/tags"
+BATCH_URL = f"{WORDPRESS_SERVER}/wp-json/batch/v1"
+# settings that must be given in the environment or .env file
+REQUIRED_SETTINGS = ("WORDPRESS_USER", "WORDPRESS_PASSWORD", "WORDPRESS_SERVER", "EVENT_API_BASE", "CONFIG_FILE")
 
 CATMAP = {}
 TAGMAP = {}
 ORGMAP = {}
 VENUEMAP = {}
 EVENTCACHE = {}
-events = configdata["events"]
-
-# this is the max number of wordpress pages to gather
-MAXPAGES = 50
+# events are recorded from the worker threads when they are sent one at a time
+EVENTCACHE_LOCK = threading.Lock()
+
+# the largest page of results the wordpress APIs will return
+PER_PAGE = 100
+# query for reading the lists used for ids, empty ones are still wanted
+LIST_PARAMS = {"hide_empty": 0, "per_page": PER_PAGE}
+
+ONE_WEEK = datetime.timedelta(weeks=1)
+
+# weekday names indexed by datetime.date.weekday(), Monday is 0
+DAY_NAMES = tuple(calendar.day_name)
+DAY_INDEX = {name: num for num, name in enumerate(DAY_NAMES)}
+
+# month names indexed by the month number, so January is 1
+MONTH_NAMES = tuple(calendar.month_name)
+# month number for each month name used by skipmonths in the config
+MONTH_NUMBERS = {name: num for num, name in enumerate(MONTH_NAMES) if name}
+
+# suffix for each day of the month indexed by the day, the teens are 11th rather than 11st
+DAY_SUFFIXES = (
+    "",
+    "st", "nd", "rd", "th", "th", "th", "th", "th", "th", "th",  # codespell:ignore nd
+    "th", "th", "th", "th", "th", "th", "th", "th", "th", "th",
+    "st", "nd", "rd", "th", "th", "th", "th", "th", "th", "th",  # codespell:ignore nd
+    "st",
+)  # fmt: skip
+
+# title used when the date is included, filled from the decode_date fields
+TITLE_TEMPLATE = "{title} [{daystr} {day}{suffixstr} {monthstr} {yearstr}]"
+
+# characters that cannot appear in a slug, and runs of dashes to collapse
+SLUG_STRIP = str.maketrans("", "", "()&$'[]{}")
+SLUG_DASHES = re.compile(r"-+")
+
+# wordpress limits a batch request to 25 requests by default
+BATCH_SIZE = 25
+# cleared if the server refuses to batch the events API
+BATCH_SUPPORTED = True
+
+# number of events that can be sent to wordpress back to back
+RATE_BURST = 5
+
+# number of requests to have in flight when events are sent one at a time
+MAX_WORKERS = 4
+# the kinds of id read at the same time by prefetch_lookups, each kind reads
+# its extra pages with MAX_WORKERS threads of its own
+LOOKUP_KINDS = 4
+
+# responses that mean the server is briefly unavailable or throttling us
+RETRY_STATUSES = frozenset([429, 500, 502, 503, 504])
+# the ones of those that mean a write was not processed, so it is safe to send
+# again, the others can come after wordpress has already created the event
+WRITE_RETRY_STATUSES = frozenset([429, 503])
+
+# seconds to wait for wordpress to connect and then to respond, when a
+# request does not set its own timeout. Connecting should be quick but
+# creating events can be slow on a busy site
+REQUEST_TIMEOUT = (3, 30)
 
 console = Console()
 cli = typer.Typer(rich_markup_mode="rich")
 _SESSION = None
 
 
-_SESSION = None
+class TimeoutHTTPAdapter(HTTPAdapter):
+    """HTTPAdapter that applies a default timeout to requests that do not set one."""
+
+    def __init__(self, timeout: float | tuple[float, float] = REQUEST_TIMEOUT, **kwargs: object) -> None:
+        """Initialise the adapter.
+
+        Args:
+            timeout: Seconds to wait for the server, or (connect, read), when the request has no timeout
+            kwargs: Passed on to HTTPAdapter
+        """
+        self.timeout = timeout
+        super().__init__(**kwargs)
+
+    def send(self, request: requests.PreparedRequest, **kwargs: object) -> requests.Response:
+        """Send the request, with the default timeout if it has none.
+
+        Args:
+            request: The prepared request to send
+            kwargs: Passed on to HTTPAdapter.send
+        """
+        if kwargs.get("timeout") is None:
+            kwargs["timeout"] = self.timeout
+        return super().send(request, **kwargs)
+
+
+class WriteSafeRetry(Retry):
+    """Retry that only resends a POST or PATCH when the server did not process it."""
+
+    def is_retry(self, method: str, status_code: int, has_retry_after: bool = False) -> bool:
+        """Check whether a response should be retried.
+
+        Args:
+            method: The HTTP method of the request
+            status_code: The status code of the response
+            has_retry_after: Whether the response has a Retry-After header
+
+        Returns:
+            True if the request should be sent again
+        """
+        if method.upper() in {"POST", "PATCH"}:
+            return bool(self.total) and status_code in WRITE_RETRY_STATUSES
+        return super().is_retry(method, status_code, has_retry_after=has_retry_after)
+
+
+class RateLimiter:
+    """Token bucket that paces events sent to wordpress, shared by the worker threads."""
+
+    def __init__(self, rate_per_minute: int = RATE_PER_MINUTE, burst: int = RATE_BURST) -> None:
+        """Initialise the bucket full, so the first requests are sent straight away.
+
+        Args:
+            rate_per_minute: Number of events allowed per minute
+            burst: Maximum number of events that can be sent back to back
+        """
+        self.rate_per_minute = rate_per_minute
+        self.burst = burst
+        self.tokens = float(burst)
+        self.last = time.monotonic()
+        self.lock = threading.Lock()
+
+    def acquire(self, count: int = 1) -> None:
+        """Wait until the bucket allows more events to be sent.
+
+        A batch takes a token for each event in it, so it may wait for more
+        tokens than the burst allows to build up.
+
+        Args:
+            count: Number of events about to be sent
+        """
+        rate = self.rate_per_minute / 60
+        # hold the lock while waiting so that worker threads queue for tokens
+        with self.lock:
+            now = time.monotonic()
+            self.tokens = min(self.burst, self.tokens + (now - self.last) * rate)
+            self.last = now
+
+            if self.tokens < count:
+                wait = (count - self.tokens) / rate
+                logging.debug("Rate limit reached, waiting %.2fs", wait)
+                time.sleep(wait)
+                self.tokens = float(count)
+                self.last = time.monotonic()
+
+            self.tokens -= count
+
+
+# paces every create/update request sent to wordpress
+RATE_LIMITER = RateLimiter()
+
+
+@functools.lru_cache(maxsize=1)
+def load_config(config_file: str = CONFIG_FILE) -> dict:
+    """Read the events configuration file, only the first call reads the file.
+
+    Args:
+        config_file: Path to the YAML configuration file
+
+    Returns:
+        dict of the configuration data
+    """
+    with open(config_file, encoding="utf-8") as configfile:
+        # Use the safe loader to prevent execution of arbitrary code, the libyaml
+        # C version is much faster when PyYAML was built with it
+        return yaml.load(configfile, Loader=getattr(yaml, "CSafeLoader", yaml.SafeLoader))
+
+
+@dataclasses.dataclass(frozen=True, slots=True)
+class EventConfig:
+    """An event from the configuration file with the optional settings filled in."""
+
+    title: str
+    desc: str
+    excerpt: str
+    starttime: str
+    endtime: str
+    days: frozenset[str]
+    # empty means every week of the month
+    weeks: frozenset[int] = frozenset()
+    # month numbers rather than names
+    skipmonths: frozenset[int] = frozenset()
+    tags: tuple[str, ...] = ()
+    categories: tuple[str, ...] = ()
+    venue: str = None
+    image: int = None
+    disabled: bool = False
+
+    @classmethod
+    def from_config(cls, event_id: str, event: dict) -> "EventConfig":
+        """Build the event from its entry in the configuration file.
+
+        Args:
+            event_id: The key of the event in the configuration file, used in errors
+            event: The event settings from the configuration file
+
+        Returns:
+            the event configuration
+
+        Raises:
+            ValueError: if a day or month name is not recognised
+        """
+        for day in event["days"]:
+            if day not in DAY_INDEX:
+                raise ValueError(f"event {event_id} has an unknown day '{day}'")
+        for month in event.get("skipmonths") or ():
+            if month not in MONTH_NUMBERS:
+                raise ValueError(f"event {event_id} has an unknown skipmonth '{month}'")
+
+        return cls(
+            title=event["title"],
+            desc=event["desc"],
+            # an empty excerpt in the config falls back to the description
+            excerpt=event.get("excerpt") or event["desc"],
+            starttime=event["starttime"],
+            endtime=event["endtime"],
+            days=frozenset(event["days"]),
+            weeks=frozenset(event.get("weeks") or ()),
+            skipmonths=frozenset(MONTH_NUMBERS[month] for month in event.get("skipmonths") or ()),
+            tags=tuple(event.get("tags") or ()),
+            categories=tuple(event.get("categories") or ()),
+            venue=event.get("venue"),
+            image=event.get("image"),
+            disabled=event.get("disabled", False),
+        )
+
+
+@functools.lru_cache(maxsize=1)
+def enabled_events_by_day() -> dict[str, dict[str, EventConfig]]:
+    """Group the enabled events in the configuration by the days they run on.
+
+    Returns:
+        dict of day name to a dict of the event configurations on that day
+    """
+    by_day = {day: {} for day in DAY_NAMES}
+    for event_id, settings in load_config()["events"].items():
+        # disabled events are left as they are in the file, so skip them unchecked
+        if settings.get("disabled", False):
+            continue
+        event = EventConfig.from_config(event_id, settings)
+        for day in event.days:
+            by_day[day][event_id] = event
+    return by_day
+
+
+@functools.lru_cache(maxsize=1)
+def wordpress_auth() -> HTTPBasicAuth:
+    """Build the wordpress Application Password credentials when first needed.
+
+    Returns:
+        requests auth object for the wordpress user
+    """
+    return HTTPBasicAuth(os.environ["WORDPRESS_USER"], os.environ["WORDPRESS_PASSWORD"])
 
 
 def get_session(headers: dict = None) -> requests.Session:
@@ -72,8 +331,27 @@ def get_session(headers: dict = None) -> requests.Session:
     global _SESSION  # noqa: PLW0603
     if _SESSION is None:
         _SESSION = requests.Session()
-        _SESSION.headers.update(wordpress_header)
+        _SESSION.auth = wordpress_auth()
+        # keep the connections to the wordpress server alive between calls, time
+        # out requests that hang and retry when the server is briefly unavailable
+        # or throttling us, waiting as long as the server asks in Retry-After.
+        # Only reads are retried after a read error, writes are only sent again
+        # when the server says it did not process them
+        retries = WriteSafeRetry(
+            total=5,
+            backoff_factor=1.0,
+            status_forcelist=RETRY_STATUSES,
+            respect_retry_after_header=True,
+            allowed_methods=frozenset(["GET"]),
+        )
+        # one pooled connection per worker thread so none of them wait for a
+        # socket, including while every kind of id is read at the same time
+        adapter = TimeoutHTTPAdapter(pool_connections=1, pool_maxsize=LOOKUP_KINDS * MAX_WORKERS, max_retries=retries)
+        _SESSION.mount("https://", adapter)
+        _SESSION.mount("http://", adapter)
         logging.debug("New session initialized with Connection Pooling.")
+    if headers:
+        _SESSION.headers.update(headers)
     return _SESSION
 
 
@@ -96,7 +374,56 @@ def setup_logging(verbose: bool) -> None:
     logging.getLogger("urllib3").setLevel(logging.WARNING)
 
 
-def cache_events(startdate: str, enddate: str, api_url: bool = None) -> None:
+def run_concurrently(func: Callable, *items: Iterable, max_workers: int = MAX_WORKERS) -> list:
+    """Call a function for each item using a small pool of worker threads.
+
+    Args:
+        func: The function to call with each item
+        items: The items to process, more than one iterable passes an argument from each
+        max_workers: The number of worker threads
+
+    Returns:
+        list of the results in the same order as the items
+    """
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        # consume the results so that any exception is raised here
+        return list(executor.map(func, *items))
+
+
+def read_events_page(api_url: str, params: dict, page: int) -> dict:
+    """Read one page of events from wordpress.
+
+    Args:
+        api_url: The URL for the wordpress event API
+        params: The query parameters for the events, without the page
+        page: The page number to read
+
+    Returns:
+        dict of the response from the wordpress event API
+    """
+    logging.debug("Current page: %s", page)
+    response = get_session().get(api_url, params={**params, "page": page})
+
+    if response.status_code != requests.codes.ok:
+        raise HTTPError(f"Unexpected error code: {response.status_code} with {response.text}", response=response)
+
+    data = response.json()
+    logging.debug("Events in page %s: %s", page, len(data["events"]))
+    return data
+
+
+def cache_event_id(slug: str, event_id: int | str) -> None:
+    """Record the wordpress id of an event in the event cache.
+
+    Args:
+        slug: The slug of the event
+        event_id: The id wordpress gave the event
+    """
+    with EVENTCACHE_LOCK:
+        EVENTCACHE[slug] = {"id": int(event_id)}
+
+
+def cache_events(startdate: str, enddate: str, api_url: str = EVENTS_URL) -> None:
     """Read the current events from wordpress.
 
     Args:
@@ -104,45 +431,66 @@ def cache_events(startdate: str, enddate: str, api_url: bool = None) -> None:
         enddate: ISO formatted date to end at
         api_url: The URL for the wordpress event API
     """
-    if api_url is None:
-        api_url = f"{WORDPRESS_SERVER}{EVENT_API_BASE}/events"
-
-    page = 1
-    total_pages = 1
     params = {
         "start_date": f"{startdate} 00:00:00",
         "end_date": f"{enddate} 23:59:59",
-        "per_page": 50,  # Get as many as possible in one go
-        "page": page,
+        "per_page": PER_PAGE,  # Get as many as possible in one go
     }
-
-    s = get_session()
+    read_page = functools.partial(read_events_page, api_url, params)
 
     console.print("Caching existing events")
-    logging.debug(f"Lookup from {startdate} to {enddate}")
-    while page <= total_pages:
-        logging.debug(f"Current pages: {page}")
-        response = s.get(api_url, params=params)
+    logging.debug("Lookup from %s to %s", startdate, enddate)
+    pages = [read_page(1)]
+    total_pages = pages[0]["total_pages"]
+    logging.debug("Total pages: %s", total_pages)
+    if total_pages > 1:
+        # once the number of pages is known the rest can be read at the same time
+        pages.extend(run_concurrently(read_page, range(2, total_pages + 1)))
+
+    for data in pages:
+        for event in data["events"]:
+            cache_event_id(event["slug"], event["id"])
+    logging.debug("Found %s events in timeframe", len(EVENTCACHE.keys()))
+    logging.debug(EVENTCACHE)
 
-        if response.status_code != requests.codes.ok:
-            raise HTTPError(f"Unexpected error code: {response.status_code} with {response.text}", response=response)
 
-        data = response.json()
-        if page == 1:
-            total_pages = data["total_pages"]
-            logging.debug(f"Total pages: {total_pages}")
+def event_request(data: dict, api_url: str, update: bool = False) -> tuple[str, str, str] | None:
+    """Work out the request needed to send an event to wordpress.
 
-        logging.debug(f"Events in page: {len(data['events'])}")
-        for event in data["events"]:
-            EVENTCACHE[event["slug"]] = {"id": event["id"]}
-        page += 1
-        params["page"] = page
-    logging.debug(f"Found {len(EVENTCACHE.keys())} events in timeframe")
-    logging.debug(EVENTCACHE)
+    Args:
+        data: The Payload formatted data for the event
+        api_url: The URL or REST route for the wordpress event API
+        update: Overwrite existing event?
+
+    Returns:
+        tuple of the HTTP method, URL and action name or None if the event should be skipped
+    """
+    if data["slug"] not in EVENTCACHE:
+        return "POST", api_url, "create"
+
+    if not update:
+        console.print(f"Event is present: {data['slug']} - skipping")
+        return None
+    data["id"] = EVENTCACHE[data["slug"]]["id"]
+    return "PATCH", f"{api_url}/{data['id']}", "update"
+
+
+def record_event(data: dict, response_json: dict, actionstr: str) -> None:
+    """Report and cache an event that wordpress has created or updated.
+
+    Args:
+        data: The Payload formatted data for the event
+        response_json: The event returned by the wordpress event API
+        actionstr: The action that was carried out, e.g. create
+    """
+    # a single print so the lines are not interleaved with other threads
+    console.print(f"Event Title {actionstr}: {response_json['title']}\nEvent URL: {response_json['url']}")
+    logging.debug(response_json)
+    cache_event_id(data["slug"], response_json["id"])
 
 
 def create_wordpress_event(
-    data: dict, api_url: str = None, headers: dict = None, dryrun: bool = False, update: bool = False
+    data: dict, api_url: str = EVENTS_URL, headers: dict = None, dryrun: bool = False, update: bool = False
 ) -> None:
     """Create a wordpress event.
 
@@ -153,37 +501,136 @@ def create_wordpress_event(
         dryrun: Dry run create or not
         update: Overwrite existing event?
     """
-    api_url = api_url or f"{WORDPRESS_SERVER}{EVENT_API_BASE}/events"
-    headers = headers or wordpress_header
-
-    method = "POST"
-    actionstr = "create"
-
-    if data["slug"] in EVENTCACHE:
-        if not update:
-            console.print(f"Event is present: {data['slug']} - skipping")
-            return
-        method = "PATCH"
-        actionstr = "update"
-        data["id"] = int(EVENTCACHE[data["slug"]]["id"])
-        api_url = f"{api_url}/{data['id']}"
+    request = event_request(data=data, api_url=api_url, update=update)
+    if request is None:
+        return
+    method, api_url, actionstr = request
 
     logging.debug(api_url)
 
     if not dryrun:
         s = get_session()
-        response = s.request(method=method, url=api_url, json=data, headers=headers, timeout=10)
-        response_json = response.json()
-        console.print(f"Event Title {actionstr}: {response_json['title']}")
-        console.print(f"Event URL: {response_json['url']}")
-        logging.debug(response_json)
-        EVENTCACHE[data["slug"]] = response_json["id"]
+        RATE_LIMITER.acquire()
+        response = s.request(method=method, url=api_url, json=data, headers=headers)
+        response.raise_for_status()
+        record_event(data=data, response_json=response.json(), actionstr=actionstr)
     else:
         console.print(f"Would {actionstr} {data['slug']} at {data['start_date']}")
         logging.debug(data)
 
 
-def get_dates_until(startdate: str, enddate: str, daynum: int) -> list:
+def batch_unsupported(response: requests.Response) -> bool:
+    """Check whether wordpress refused a batch request without processing any of it.
+
+    Args:
+        response: The response from the wordpress batch API
+
+    Returns:
+        True if the server has no batch API or the events API cannot be batched
+    """
+    if response.status_code in {requests.codes.not_found, requests.codes.method_not_allowed}:
+        return True
+    try:
+        data = response.json()
+    except ValueError:
+        return False
+    if not isinstance(data, dict):
+        return False
+    if data.get("code") == "rest_no_route":
+        return True
+    # routes have to opt in to batching, otherwise each request is refused
+    return any(
+        isinstance(result.get("body"), dict) and result["body"].get("code") == "rest_batch_not_allowed"
+        for result in data.get("responses") or []
+    )
+
+
+def create_wordpress_events(
+    events: list[dict],
+    api_url: str = EVENTS_URL,
+    batch_url: str = BATCH_URL,
+    headers: dict = None,
+    dryrun: bool = False,
+    update: bool = False,
+) -> None:
+    """Create a list of wordpress events using as few requests as possible.
+
+    The events are sent to the wordpress REST batch API BATCH_SIZE at a time,
+    if the server does not allow the events API to be batched they are sent
+    individually, MAX_WORKERS at a time.
+
+    Args:
+        events: List of the Payload formatted data for the events
+        api_url: The URL for the wordpress event API
+        batch_url: The URL for the wordpress batch API
+        headers: Requests object additional headers to send
+        dryrun: Dry run create or not
+        update: Overwrite existing event?
+    """
+    global BATCH_SUPPORTED  # noqa: PLW0603
+
+    if dryrun:
+        for data in events:
+            create_wordpress_event(data=data, api_url=api_url, headers=headers, dryrun=dryrun, update=update)
+        return
+
+    send_event = functools.partial(create_wordpress_event, api_url=api_url, headers=headers, update=update)
+    if not BATCH_SUPPORTED:
+        run_concurrently(send_event, events)
+        return
+
+    # the batch API works with the REST route rather than the full URL
+    route = urllib.parse.urlsplit(api_url).path.removeprefix("/wp-json")
+    pending = []
+    for data in events:
+        request = event_request(data=data, api_url=route, update=update)
+        if request is not None:
+            pending.append((data, request))
+
+    s = get_session()
+    failed = 0
+    for start in range(0, len(pending), BATCH_SIZE):
+        batch = pending[start : start + BATCH_SIZE]
+        if BATCH_SUPPORTED:
+            RATE_LIMITER.acquire(len(batch))
+            payload = {
+                "requests": [{"method": method, "path": path, "body": data} for data, (method, path, _) in batch]
+            }
+            response = s.post(batch_url, json=payload, headers=headers)
+            if not batch_unsupported(response):
+                if response.status_code not in {requests.codes.ok, requests.codes.multi_status}:
+                    # the server may have processed some or all of the batch, so
+                    # sending it again could create the events twice
+                    console.print(f"Batch of {len(batch)} events failed with status {response.status_code}")
+                    failed += len(batch)
+                    continue
+                results = response.json()["responses"]
+                # anything the batch did not answer is sent again on its own
+                retry = [data for data, _ in batch[len(results) :]]
+                for (data, (_, _, actionstr)), result in zip(batch, results, strict=False):
+                    if result["status"] in WRITE_RETRY_STATUSES:
+                        retry.append(data)
+                        continue
+                    if result["status"] >= requests.codes.bad_request:
+                        console.print(f"Failed to {actionstr} {data['slug']}: {result['body'].get('message')}")
+                        failed += 1
+                        continue
+                    record_event(data=data, response_json=result["body"], actionstr=actionstr)
+                if retry:
+                    console.print(f"Sending {len(retry)} events from the batch one at a time")
+                    run_concurrently(send_event, retry)
+                continue
+            console.print("Batch requests are not supported, sending events one at a time")
+            BATCH_SUPPORTED = False
+
+        run_concurrently(send_event, [data for data, _ in batch])
+
+    # fail the run the same way as when the events are sent one at a time
+    if failed:
+        raise HTTPError(f"{failed} of {len(pending)} events could not be sent, see the failures above")
+
+
+def get_dates_until(startdate: str, enddate: str, daynum: int) -> list[datetime.date]:
     """Get the date of the day for the next N weeks.
 
     Args:
@@ -194,54 +641,55 @@ def get_dates_until(startdate: str, enddate: str, daynum: int) -> list:
     Returns:
         A list of dates for the same date for the next N weeks
     """
-    start = pendulum.parse(startdate)
-    end = pendulum.parse(enddate)
+    start = datetime.date.fromisoformat(startdate)
+    end = datetime.date.fromisoformat(enddate)
 
-    dates = []
+    # move forward to the first instance of the day, which may be the start
+    # date itself, then step a week at a time
+    first = start + datetime.timedelta(days=(daynum - start.weekday()) % 7)
+    weekcount = (end - first).days // 7 + 1
+    dates = [first + i * ONE_WEEK for i in range(weekcount)]
 
-    current = start.next(daynum) if start.day_of_week != daynum else start
-    while current <= end:
-        dates.append(current.to_date_string())
-        current = current.add(weeks=1)
-
-    logging.debug(f"Dates for {daynum}: {dates}")
+    logging.debug("Dates for %s: %s", daynum, dates)
     return dates
 
 
-def decode_date(date: str) -> dict:
-    """Decode the date string to something nicer.
+@functools.lru_cache(maxsize=512)
+def decode_date(date: datetime.date) -> Mapping:
+    """Decode the date to something nicer.
+
+    The result is cached per date, so it is returned as a read-only
+    mapping to stop callers modifying the shared value.
 
     Args:
-        date: ISO formatted date string
+        date: The date to decode
 
     Returns:
-        dict of data represented by the date
+        read-only mapping of data represented by the date
     """
-    dt = pendulum.parse(date)
-    day = dt.day
-
-    # work out the suffis for the day, i.e. 1st or 5th etc
-    if 11 <= day <= 13:  # noqa: PLR2004
-        # these are the teens so 11th instead of 11st
-        suffix = "th"
-    else:
-        suffix = {1: "st", 2: "nd", 3: "rd"}.get(day % 10, "th")  # codespell:ignore nd
+    day = date.day
 
+    # everything comes straight from the attributes and the name tables
+    # rather than going through strftime
     date_info = {
-        "daystr": dt.format("dddd"),
-        "datenum": dt.format("DD"),
-        "monthstr": dt.format("MMMM"),
-        "monthnum": dt.format("MM"),
-        "yearstr": dt.format("YYYY"),
-        "suffixstr": suffix,
+        "daystr": DAY_NAMES[date.weekday()],
+        "day": day,
+        "datenum": f"{day:02d}",
+        "monthstr": MONTH_NAMES[date.month],
+        "month": date.month,
+        "monthnum": f"{date.month:02d}",
+        "yearstr": f"{date.year:04d}",
+        "isodate": date.isoformat(),
+        "suffixstr": DAY_SUFFIXES[day],
+        # which occurrence of this weekday in the month, e.g. 2 for the second Sunday
         "week_num": (day - 1) // 7 + 1,
     }
 
-    logging.debug(f"{date_info}")
-    return date_info
+    logging.debug(date_info)
+    return MappingProxyType(date_info)
 
 
-def format_title(date_info: dict, title: str, include_date: bool = False) -> str:
+def format_title(date_info: Mapping, title: str, include_date: bool = False) -> str:
     """Format the title of an event.
 
     Args:
@@ -253,29 +701,25 @@ def format_title(date_info: dict, title: str, include_date: bool = False) -> str
         A formatted string for the title
     """
     if include_date:
-        return (
-            f"{title} "
-            f"[{date_info['daystr']} {date_info['datenum'].lstrip('0')}{date_info['suffixstr']} "
-            f"{date_info['monthstr']} {date_info['yearstr']}]"
-        )
-    return f"{title}"
+        return TITLE_TEMPLATE.format(title=title, **date_info)
+    return title
 
 
-def build_slug(date_info: dict, title: str) -> str:
-    """Build the slug for the event.
+@functools.lru_cache(maxsize=512)
+def slugify_title(title: str) -> str:
+    """Turn an event title into the title part of a slug.
 
     This function will remove characters from the slug that cannot appear, for
-    example HTML encoded entities or brackets and so on
+    example HTML encoded entities or brackets and so on. The same titles are
+    used for every date, so the result is cached.
 
     Args:
-        date_info: Dict from decode_date with information about the date
         title: The title text to include
 
     Returns:
-        The constructing string slug
+        The title as slug text
     """
-    slug = f"{date_info['yearstr']}-{date_info['monthnum']}-{date_info['datenum']}-{(title.lower()).replace(' ', '-')}"
-    logging.debug(f"Initial slug:\t{slug}")
+    slug = title.lower().replace(" ", "-")
 
     # build unicode version of slug with HTML stripped
     slug = html.unescape(slug)
@@ -286,37 +730,42 @@ def build_slug(date_info: dict, title: str) -> str:
     slug = "".join(c for c in slug if unicodedata.category(c) != "Mn")
 
     # now remove any left over unwanted characters
-    slug = slug.translate(str.maketrans("", "", "()&$'[]{}"))
-    slug = re.sub(r"\-+", "-", slug)
-    slug = slug.strip("-")
-    logging.debug(f"Final slug:\t{slug}")
+    slug = slug.translate(SLUG_STRIP)
+    slug = SLUG_DASHES.sub("-", slug)
+    return slug.strip("-")
+
+
+def build_slug(date_info: Mapping, title: str) -> str:
+    """Build the slug for the event.
+
+    Args:
+        date_info: Dict from decode_date with information about the date
+        title: The title text to include
+
+    Returns:
+        The constructing string slug
+    """
+    # the date part is already plain YYYY-MM-DD so only the title needs cleaning
+    title_slug = slugify_title(title)
+    slug = f"{date_info['isodate']}-{title_slug}" if title_slug else date_info["isodate"]
+    logging.debug("Final slug:\t%s", slug)
     return slug
 
 
-def format_event(
-    title: str,
+def event_skeleton(
     description: str,
     excerpt: str,
-    date: str,
-    date_info: dict,
-    starttime: str,
-    endtime: str,
     tags: list[str] = None,
     categories: list[str] = None,
     venue: str = None,
     organiser: str = None,
     image: int = None,
 ) -> dict:
-    """Format an event for wordpress events calendar.
+    """Format the parts of an event that are the same for every date.
 
     Args:
-        title: The title for the event
         description: HTML formatted string for the description
         excerpt: HTML formatted string for the except - usually a shorter version of description
-        date: ISO formatted date for event
-        date_info: Representation of the date
-        starttime: Start time of the event of format HH:MM:SS
-        endtime: End time of the event of format HH:MM:SS
         tags: tags to apply to event in string format
         categories: categories to apply to event in string format
         venue: Name of the venue slug
@@ -324,87 +773,299 @@ def format_event(
         image: The featured image reference id
 
     Returns:
-        dict of the data for the wordpress API
+        dict of the date independent data for the wordpress API
     """
     tags = tags or []
     categories = categories or []
     venue = get_venueid(venue=venue)
     organiser = get_orgid(organiser=organiser)
 
-    data = {
-        "title": str(format_title(date_info=date_info, title=title)),
-        "slug": str(build_slug(date_info=date_info, title=title)),
+    skeleton = {
         "description": str(description),
         "excerpt": str(excerpt),
-        "start_date": f"{date} {starttime}",
-        "end_date": f"{date} {endtime}",
         "venue": str(venue),
         "organizer": str(organiser),
         "status": "publish",
         "show_map": True,
         "show_map_link": True,
-        "tags": [],
-        "categories": [],
+        "tags": [get_tagid(tag) for tag in tags],
+        "categories": [get_catid(cat) for cat in categories],
     }
 
-    for tag in tags:
-        data["tags"].append(get_tagid(tag))
+    if image:
+        skeleton["image"] = str(image)
 
-    for cat in categories:
-        data["categories"].append(get_catid(cat))
+    return skeleton
 
-    if image:
-        data["image"] = str(image)
 
-    logging.debug("Formatted event:")
-    logging.debug(data)
+def format_event(
+    title: str,
+    date: datetime.date,
+    date_info: Mapping,
+    starttime: str,
+    endtime: str,
+    skeleton: dict,
+    slug: str = None,
+) -> dict:
+    """Format an event for wordpress events calendar.
+
+    Args:
+        title: The title for the event
+        date: The date of the event
+        date_info: Representation of the date
+        starttime: Start time of the event of format HH:MM:SS
+        endtime: End time of the event of format HH:MM:SS
+        skeleton: The date independent data from event_skeleton
+        slug: The slug from build_slug if already known
+
+    Returns:
+        dict of the data for the wordpress API
+    """
+    data = {
+        **skeleton,
+        "title": str(format_title(date_info=date_info, title=title)),
+        "slug": slug or build_slug(date_info=date_info, title=title),
+        "start_date": f"{date.isoformat()} {starttime}",
+        "end_date": f"{date.isoformat()} {endtime}",
+    }
+
+    logging.debug("Formatted event: %s", data)
     return data
 
 
-def get_venueid(venue: str = None, api_url: str = None, headers: dict = None) -> int:
-    """Lookup or read cache of venue id for the venue.
+def read_list_page(api_url: str, params: dict, page: int, headers: dict = None) -> requests.Response:
+    """Read one page of a wordpress list API.
 
     Args:
-        venue: Venue slug name
-        api_url: The URL for the wordpress events venues API
+        api_url: The URL for the wordpress list API
+        params: The query parameters for the list, without the page
+        page: The page number to read
         headers: Requests object additional headers to send
 
     Returns:
-        integer ID of the venue
+        the response from the wordpress API
     """
-    venue = venue or DEFAULT_VENUE
-    api_url = api_url or f"{WORDPRESS_SERVER}{EVENT_API_BASE}/venues?&hide_empty=0"
+    return get_session().get(api_url, params={**params, "page": page}, headers=headers)
+
+
+def idmap_cache_file(api_url: str) -> str | None:
+    """Work out the file that keeps the ids read from a list API between runs.
+
+    Args:
+        api_url: The URL for the wordpress list API
+
+    Returns:
+        path of the cache file or None if the cache is disabled
+    """
+    if not ID_CACHE_DIR:
+        return None
+    name = hashlib.sha256(api_url.encode()).hexdigest()[:16]
+    return os.path.join(ID_CACHE_DIR, f"{name}.json")
+
+
+def read_idmap_cache(cache_file: str | None) -> dict | None:
+    """Read the ETag and ids saved by a previous run.
+
+    Args:
+        cache_file: Path of the cache file
+
+    Returns:
+        dict with the etag and ids or None if there is nothing usable
+    """
+    if cache_file is None:
+        return None
+    try:
+        with open(cache_file, encoding="utf-8") as cachefile:
+            cached = json.load(cachefile)
+    except (OSError, ValueError):
+        return None
+    # a file from an older or interrupted run is treated as no cache
+    if not isinstance(cached, dict) or not cached.get("etag") or not isinstance(cached.get("ids"), dict):
+        return None
+    return cached
+
+
+def write_idmap_cache(cache_file: str | None, etag: str, ids: dict) -> None:
+    """Save the ETag and ids read from a list API for the next run.
+
+    Args:
+        cache_file: Path of the cache file
+        etag: The ETag wordpress returned for the list
+        ids: The slug to integer id map read from the list
+    """
+    if cache_file is None:
+        return
+    cache_dir = os.path.dirname(cache_file)
+    try:
+        os.makedirs(cache_dir, exist_ok=True)
+        # write to a temporary file and move it into place, so a run that is
+        # stopped part way never leaves a half written cache behind
+        fd, tmp_file = tempfile.mkstemp(dir=cache_dir, suffix=".tmp")
+    except OSError as e:
+        logging.debug("Unable to save id cache %s: %s", cache_file, e)
+        return
+    try:
+        with open(fd, "w", encoding="utf-8") as cachefile:
+            json.dump({"etag": etag, "ids": ids}, cachefile)
+        os.replace(tmp_file, cache_file)
+    except OSError as e:
+        logging.debug("Unable to save id cache %s: %s", cache_file, e)
+        os.unlink(tmp_file)
+
+
+def populate_idmap(idmap: dict, api_url: str, key: str = None) -> None:
+    """Read every page of a wordpress list API into a slug to id map.
+
+    If the list fitted in one page last time, its ids are kept on disk and
+    wordpress is asked to only send the list again if it has changed.
+
+    Args:
+        idmap: The map to fill with slug to integer id
+        api_url: The URL for the wordpress list API
+        key: The key holding the items in the response, None if the response is the list
+    """
+    cache_file = idmap_cache_file(api_url)
+    cached = read_idmap_cache(cache_file)
+    headers = {"If-None-Match": cached["etag"]} if cached else None
+
+    # only the id and slug are used, but wordpress can only trim the fields
+    # of each item when the response is the list itself
+    params = LIST_PARAMS if key else {**LIST_PARAMS, "_fields": "id,slug"}
+    responses = [read_list_page(api_url, params, 1, headers=headers)]
+    if cached and responses[0].status_code == requests.codes.not_modified:
+        logging.debug("Using cached ids for %s", api_url)
+        idmap.update(cached["ids"])
+        return
+
+    # wordpress says how many pages there are, so there is no need to guess a
+    # limit or read past the end. The events calendar lists give it in the body,
+    # which has no items or page count when the list is empty, the core lists
+    # give it in a header
+    if key:
+        first = responses[0].json()
+        total_pages = int(first["total_pages"]) if first.get(key) else 1
+    else:
+        total_pages = int(responses[0].headers.get("X-WP-TotalPages", 1))
+    logging.debug("Total pages for %s: %s", api_url, total_pages)
+    if total_pages > 1:
+        responses.extend(
+            run_concurrently(functools.partial(read_list_page, api_url, params), range(2, total_pages + 1))
+        )
+
+    ids = {}
+    for response in responses:
+        data = response.json()
+        items = data.get(key) if key and data else data
+        for item in items or []:
+            ids[item["slug"]] = int(item["id"])
+    idmap.update(ids)
+
+    # the ETag only covers the first page, so only a single page list can be kept
+    etag = responses[0].headers.get("ETag")
+    if etag and total_pages == 1:
+        write_idmap_cache(cache_file, etag=etag, ids=ids)
+
+
+def by_slug_url(api_url: str, slug: str) -> str:
+    """Build the by-slug URL for a venue or organiser.
+
+    Args:
+        api_url: The URL for the wordpress events venues or organisers API
+        slug: The slug to lookup
+
+    Returns:
+        the API URL with /by-slug/{slug} added to the path
+    """
+    return f"{api_url}/by-slug/{urllib.parse.quote(slug)}"
+
+
+def lookup_by_slug(api_url: str, slug: str) -> int | None:
+    """Lookup a single venue or organiser with the events by-slug API.
+
+    Args:
+        api_url: The URL for the wordpress events venues or organisers API
+        slug: The slug to lookup
+
+    Returns:
+        integer ID or None if not found
+    """
+    response = get_session().get(by_slug_url(api_url, slug))
+    data = response.json()
+    return int(data["id"]) if data else None
+
+
+def lookup_tag(api_url: str, slug: str) -> int | None:
+    """Lookup a single tag with the wordpress tags API.
+
+    Args:
+        api_url: The URL for the wordpress tags API
+        slug: The tag slug to lookup
+
+    Returns:
+        integer ID or None if not found
+    """
+    response = get_session().get(api_url, params={"hide_empty": 0, "slug": slug, "_fields": "id"})
+    data = response.json()
+    return int(data[0]["id"]) if data else None
+
+
+def lookup_id(
+    kind: str, slug: str, idmap: dict, api_url: str, key: str, lookup: Callable[[str, str], int | None] = None
+) -> int:
+    """Lookup or read cache of the id for a slug.
+
+    The first miss reads the whole list into the map, anything still missing
+    after that is looked up on its own if there is a lookup function.
 
+    Args:
+        kind: The kind of thing being looked up, used in messages
+        slug: The slug to lookup
+        idmap: The cache of slug to integer id
+        api_url: The URL for the wordpress list API
+        key: The key holding the items in the list response, None if the response is the list
+        lookup: Function to lookup a single slug, given the api_url and slug, or None
+
+    Returns:
+        integer ID for the slug
+    """
     try:
-        return int(VENUEMAP[venue])
+        # fast path - already cached
+        return idmap[slug]
     except KeyError:
-        s = get_session()
-        if not VENUEMAP:
-            console.print("Venuemap is empty, try to populate it")
-            response = s.get(f"{api_url}", timeout=10)
-            data = response.json()
-            for venuedata in data["venues"]:
-                VENUEMAP[venuedata["slug"]] = venuedata["id"]
-            logging.debug(f"VENUEMAP after populate: {VENUEMAP}")
-
-        # we need to use a different lookup to the organiser API by-slug
-        if venue not in VENUEMAP:
-            console.print(f"Lookup venue {venue}")
-            slug_api_url = api_url.replace("?", f"/by-slug/{venue}?")
-            response = s.get(f"{slug_api_url}", timeout=10)
-            data = response.json()
-            if not data:
-                raise ValueError(f"lookup venue {venue} failed") from None
-            VENUEMAP[venue] = int(data["id"])
-            logging.debug(f"VENUEMAP after lookup {venue}: {VENUEMAP}")
+        if not idmap:
+            logging.debug("Map of %s is empty, try to populate it", kind)
+            populate_idmap(idmap, api_url=api_url, key=key)
+            logging.debug("Map of %s after populate: %s", kind, idmap)
+
+        if slug not in idmap and lookup is not None:
+            logging.debug("Lookup %s %s", kind, slug)
+            found = lookup(api_url, slug)
+            if found is not None:
+                idmap[slug] = found
+            logging.debug("Map of %s after lookup %s: %s", kind, slug, idmap)
 
     try:
-        return int(VENUEMAP[venue])
+        return idmap[slug]
     except KeyError:
-        raise ValueError(f"lookup venue {venue} failed") from None
+        raise ValueError(f"lookup {kind} {slug} failed") from None
+
 
+def get_venueid(venue: str = None, api_url: str = VENUES_URL, headers: dict = None) -> int:
+    """Lookup or read cache of venue id for the venue.
+
+    Args:
+        venue: Venue slug name
+        api_url: The URL for the wordpress events venues API
+        headers: Requests object additional headers to send
 
-def get_orgid(organiser: str = None, api_url: str = None, headers: dict = None) -> int:
+    Returns:
+        integer ID of the venue
+    """
+    venue = venue or DEFAULT_VENUE
+    return lookup_id("venue", venue, VENUEMAP, api_url=api_url, key="venues", lookup=lookup_by_slug)
+
+
+def get_orgid(organiser: str = None, api_url: str = ORGANIZERS_URL, headers: dict = None) -> int:
     """Lookup or read cache of organiser id from organiser.
 
     Args:
@@ -416,38 +1077,10 @@ def get_orgid(organiser: str = None, api_url: str = None, headers: dict = None)
         integer ID of the organiser
     """
     organiser = organiser or DEFAULT_ORGANISER
-    api_url = api_url or f"{WORDPRESS_SERVER}{EVENT_API_BASE}/organizers?hide_empty=0"
-
-    try:
-        return int(ORGMAP[organiser])
-    except KeyError:
-        s = get_session()
-        if not ORGMAP:
-            console.print("Orgmap is empty, try to populate it")
-            response = s.get(f"{api_url}", timeout=10)
-            data = response.json()
-            for org in data["organizers"]:
-                ORGMAP[org["slug"]] = org["id"]
-            logging.debug(f"ORGMAP after populate: {ORGMAP}")
-
-        # we need to use a different lookup to the organiser API by-slug
-        if organiser not in ORGMAP:
-            console.print(f"Lookup organiser {organiser}")
-            slug_api_url = api_url.replace("?", f"/by-slug/{organiser}?")
-            response = s.get(f"{slug_api_url}", timeout=10)
-            data = response.json()
-            if not data:
-                raise ValueError(f"lookup organiser {organiser} failed") from None
-            ORGMAP[organiser] = int(data["id"])
-            logging.debug(f"ORGMAP after lookup {organiser}: {ORGMAP}")
+    return lookup_id("organiser", organiser, ORGMAP, api_url=api_url, key="organizers", lookup=lookup_by_slug)
 
-    try:
-        return int(ORGMAP[organiser])
-    except KeyError:
-        raise ValueError(f"lookup organiser {organiser} failed") from None
 
-
-def get_tagid(tag: str, api_url: str = None, headers: dict = None) -> int:
+def get_tagid(tag: str, api_url: str = TAGS_URL, headers: dict = None) -> int:
     """Lookup or read cache of tag id for tag.
 
     Args:
@@ -458,41 +1091,10 @@ def get_tagid(tag: str, api_url: str = None, headers: dict = None) -> int:
     Returns:
         integer ID of the tag
     """
-    api_url = api_url or f"{WORDPRESS_SERVER}/wp-json/wp/v2/tags?hide_empty=0"
+    return lookup_id("tag", tag, TAGMAP, api_url=api_url, key=None, lookup=lookup_tag)
 
-    try:
-        # fast path - already cached
-        return int(TAGMAP[tag])
-    except KeyError:
-        s = get_session()
-        if not TAGMAP:
-            console.print("Tagmap is empty, try to populate it")
-            page = 1
-            while page < MAXPAGES:
-                response = s.get(f"{api_url}&per_page=50&page={page}", timeout=10)
-                data = response.json()
-                if not data:
-                    break
-                for tagdata in data:
-                    TAGMAP[tagdata["slug"]] = int(tagdata["id"])
-                page += 1
-            logging.debug(f"TAGMAP after lookup: {TAGMAP}")
-
-        if tag not in TAGMAP:
-            console.print(f"Lookup tag {tag}")
-            response = s.get(f"{api_url}&slug={tag}", timeout=10)
-            data = response.json()
-            if not data:
-                raise ValueError(f"lookup tag {tag} failed") from None
-            TAGMAP[tag] = int(data[0]["id"])
-            logging.debug(f"TAGMAP after lookup {tag}: {TAGMAP}")
-    try:
-        return int(TAGMAP[tag])
-    except KeyError:
-        raise ValueError(f"lookup tag {tag} failed") from None
 
-
-def get_catid(cat: str, api_url: str = None, headers: dict = None) -> int:
+def get_catid(cat: str, api_url: str = CATEGORIES_URL, headers: dict = None) -> int:
     """Lookup or read cache of cat id for category.
 
     Args:
@@ -503,122 +1105,124 @@ def get_catid(cat: str, api_url: str = None, headers: dict = None) -> int:
     Returns:
         integer ID of the category
     """
-    api_url = api_url or f"{WORDPRESS_SERVER}{EVENT_API_BASE}/categories?hide_empty=0"
+    # every page of categories has been read, so one that is not there is missing
+    return lookup_id("cat", cat, CATMAP, api_url=api_url, key="categories")
 
-    try:
-        return int(CATMAP[cat])
-    except KeyError:
-        s = get_session()
-        if not CATMAP:
-            console.print("Catmap is empty, try to populate it")
-            page = 1
-            while page < MAXPAGES:
-                response = s.get(f"{api_url}&per_page=50&page={page}", timeout=10)
-                data = response.json()
-                if not data or not data["categories"]:
-                    break
-                for catdata in data["categories"]:
-                    CATMAP[catdata["slug"]] = int(catdata["id"])
-                if page == data["total_pages"]:
-                    break
-                page += 1
-            logging.debug(f"CATMAP after lookup: {CATMAP}")
-
-        if cat not in CATMAP:
-            console.print(f"Lookup category {cat}")
-            page = 1
-            while page < MAXPAGES:
-                # you cannot lookup by slug=cat, Events API returns all
-                # so we use search and filter that to find the category
-                # using ?slug=[{cat}]&hide_empty=false might also work
-                response = s.get(f"{api_url}&search={cat}", timeout=10)
-                data = response.json()
-                if not data or not data["categories"]:
-                    break
-                for catdata in data["categories"]:
-                    if catdata["slug"] == cat:
-                        CATMAP[cat] = int(catdata["id"])
-                        break
-                if page == data["total_pages"]:
-                    break
-                page += 1
-            logging.debug(f"CATMAP after lookup {cat}: {CATMAP}")
 
-    try:
-        return int(CATMAP[cat])
-    except KeyError:
-        raise ValueError(f"lookup cat {cat} failed") from None
+def resolve_ids(lookup: Callable[[str], int], slugs: Iterable[str]) -> list[int]:
+    """Resolve each slug to its id with a lookup function.
+
+    Args:
+        lookup: One of the get_*id functions
+        slugs: The slugs to resolve
+
+    Returns:
+        list of the integer IDs
+    """
+    return [lookup(slug) for slug in slugs]
+
+
+def prefetch_lookups(events: Iterable[EventConfig]) -> None:
+    """Resolve the ids of the venues, organiser, tags and categories used by events.
+
+    The first lookup of each kind reads the whole list from wordpress, so this
+    fills the maps before any event is formatted and fails early on a bad slug.
+
+    Args:
+        events: Event configurations that are going to be created
+    """
+    events = list(events)
+    lookups = {
+        get_venueid: {event.venue for event in events},
+        get_orgid: {None},
+        get_tagid: {tag for event in events for tag in event.tags},
+        get_catid: {cat for event in events for cat in event.categories},
+    }
+    # each kind only fills its own map, so the kinds can be read at the same time
+    run_concurrently(resolve_ids, lookups.keys(), lookups.values(), max_workers=LOOKUP_KINDS)
 
 
 def events_by_day(
     day: str,
-    api_url: str = None,
-    headers: dict = None,
     startdate: str = None,
     enddate: str = None,
-    dryrun: bool = False,
-    update: bool = False,
     limit: list[str] = None,
-    delay: int = 1,
-) -> None:
-    """Create a recurring events for a day.
+    skeletons: dict = None,
+    update: bool = False,
+    queued: set[str] = None,
+) -> list[dict]:
+    """Format the recurring events for a day.
 
     Args:
         day: The day name to process
-        api_url: The URL for the wordpress event API
-        headers: Requests object additional headers to send
         startdate: ISO formatted date to start from
         enddate: ISO formatted date to end at
-        dryrun: Dry run create or not
-        update: Overwrite existing event?
         limit: List of short event names (the index in events config) to limit to
-        delay: Seconds to pause between each day to process to help prevent server overload
+        skeletons: Date independent event data already formatted, keyed by event name
+        update: Overwrite existing event?
+        queued: Slugs of the events already formatted in this run, added to as events are formatted
+
+    Returns:
+        list of event data for the wordpress API
     """
-    # Maps 'Saturday' -> 5 (0-indexed in Pendulum 3 WeekDay Enum)
-    daynum = pendulum.WeekDay[day.upper()].value
-    logging.debug(f"Day: {day} maps to {daynum}")
-    api_url = api_url or f"{WORDPRESS_SERVER}{EVENT_API_BASE}/events"
-    headers = headers or wordpress_header
-    limit = limit or []
+    # Maps 'Saturday' -> 5, the same numbering as datetime.date.weekday()
+    daynum = DAY_INDEX[day]
+    logging.debug("Day: %s maps to %s", day, daynum)
+    skeletons = {} if skeletons is None else skeletons
+    queued = set() if queued is None else queued
 
     dates_for_day = get_dates_until(startdate=startdate, enddate=enddate, daynum=daynum)
+    day_events = []
 
-    # find the events which are on this day and ignore disabled ones
-    filtered_events = {k: v for k, v in events.items() if day in v["days"] and (not v.get("disabled", False))}
+    # find the events which are on this day, disabled ones are already left out
+    filtered_events = {k: v for k, v in enabled_events_by_day()[day].items() if not limit or k in limit}
 
     for date in dates_for_day:
         # gather some useful data about the date
         date_info = decode_date(date=date)
 
         for event_id, event in filtered_events.items():
-            if limit and event_id not in limit:
-                continue
             # for this date, only if the week matches the date's week number
-            # if weeks is not present or Null, then it is every week
-            if event.get("weeks", False) and date_info["week_num"] not in event["weeks"]:
+            if event.weeks and date_info["week_num"] not in event.weeks:
                 continue
             # if its a month that we should skip, skip it
-            if event.get("skipmonths", []) and date_info["monthstr"] in event.get("skipmonths", []):
+            if date_info["month"] in event.skipmonths:
                 # logging.debug("Skip event by month")
                 # logging.debug(event)
                 continue
+            # skip events that are already in wordpress before doing any formatting
+            slug = build_slug(date_info=date_info, title=event.title)
+            if slug in EVENTCACHE and not update:
+                console.print(f"Event is present: {slug} - skipping")
+                continue
+            # nothing is sent until every day is formatted, so the cache does not
+            # know about events from earlier in this run yet
+            if slug in queued:
+                console.print(f"Event is already queued: {slug} - skipping")
+                continue
+            queued.add(slug)
+            # the lookups for the tags, venue etc are the same for every date
+            if event_id not in skeletons:
+                skeletons[event_id] = event_skeleton(
+                    description=event.desc,
+                    excerpt=event.excerpt,
+                    tags=event.tags,
+                    categories=event.categories,
+                    image=event.image,
+                    venue=event.venue,
+                )
             edata = format_event(
-                title=event["title"],
-                description=event["desc"],
-                excerpt=event.get("excerpt", event["desc"]),
+                title=event.title,
                 date=date,
                 date_info=date_info,
-                starttime=event["starttime"],
-                endtime=event["endtime"],
-                tags=event.get("tags", []),
-                categories=event.get("categories", []),
-                image=event.get("image", None),
-                venue=event.get("venue", None),
+                starttime=event.starttime,
+                endtime=event.endtime,
+                skeleton=skeletons[event_id],
+                slug=slug,
             )
-            create_wordpress_event(data=edata, api_url=api_url, headers=headers, dryrun=dryrun, update=update)
+            day_events.append(edata)
 
-    if not dryrun:
-        time.sleep(delay)
+    return day_events
 
 
 def validate_days(value: str) -> list[str]:
@@ -627,14 +1231,14 @@ def validate_days(value: str) -> list[str]:
     Args:
         value: Comma seaprated listed of days
     """
-    DAYS_OF_WEEK = [day.name.capitalize() for day in pendulum.WeekDay]
     if value in {"all", "All", "ALL"}:
-        return DAYS_OF_WEEK
-    items = [item.strip() for item in value.split(",")]
+        return list(DAY_NAMES)
+    # keep the order given but only process each day once
+    items = list(dict.fromkeys(item.strip() for item in value.split(",")))
     for item in items:
-        if item not in DAYS_OF_WEEK:
+        if item not in DAY_NAMES:
             # Typer-specific error reporting
-            raise typer.BadParameter(f"'{item}' is not a valid day. Valid choices are: {', '.join(DAYS_OF_WEEK)}")
+            raise typer.BadParameter(f"'{item}' is not a valid day. Valid choices are: {', '.join(DAY_NAMES)}")
     return items
 
 
@@ -643,12 +1247,17 @@ def validate_date(value: str) -> str:
 
     Args:
         value: ISO formatted date string
+
+    Returns:
+        The date as YYYY-MM-DD
     """
+    if value is None:
+        # optional date not given
+        return value
     try:
-        pendulum.parse(value)
-    except pendulum.parsing.exceptions.ParserError:
+        return datetime.date.fromisoformat(value).isoformat()
+    except ValueError:
         raise typer.BadParameter(f"'{value}' is not a valid ISO date. Should be YYYY-MM-DD e.g. 2026-01-31") from None
-    return value
 
 
 def break_limit(value: str) -> list[str]:
@@ -659,12 +1268,11 @@ def break_limit(value: str) -> list[str]:
     """
     if not value:
         return []
+    events = load_config()["events"]
     items = [item.strip() for item in value.split(",")]
     for item in items:
-        if item not in configdata["events"]:
-            raise typer.BadParameter(
-                f"'{item}' is not a event key. Valid choices are: {', '.join(configdata['events'].keys())}"
-            )
+        if item not in events:
+            raise typer.BadParameter(f"'{item}' is not a event key. Valid choices are: {', '.join(events.keys())}")
 
     return items
 
@@ -682,36 +1290,60 @@ def main(
     weeks: Annotated[int, typer.Option(min=1, max=52)] = 12,
     startdate: Annotated[
         str, typer.Option(callback=validate_date, help="ISO start date")
-    ] = pendulum.now().to_date_string(),
+    ] = datetime.date.today().isoformat(),
     enddate: Annotated[str, typer.Option(callback=validate_date, help="ISO end date (overrides weeks)")] = None,
     update: Annotated[bool, typer.Option(help="Update existing events if found")] = False,
     verbose: Annotated[bool, typer.Option("--verbose", "--debug")] = False,
     dryrun: Annotated[bool, typer.Option(help="Do not actually create/update")] = False,
+    rate: Annotated[
+        int, typer.Option(min=1, help="Maximum events to create/update per minute (overrides RATE_PER_MINUTE)")
+    ] = RATE_PER_MINUTE,
 ) -> int:
     """The main function of the code."""
     setup_logging(verbose)
-    start_dt = pendulum.parse(startdate)
+    missing = [name for name in REQUIRED_SETTINGS if not os.getenv(name)]
+    if missing:
+        console.print(f"Missing required settings: {', '.join(missing)}")
+        raise typer.Exit(code=1)
+    RATE_LIMITER.rate_per_minute = rate
 
     if enddate:
-        final_end_date = pendulum.parse(enddate).to_date_string()
+        # already normalised to YYYY-MM-DD by validate_date
+        final_end_date = enddate
     else:
         # Subtract 1 day so '1 week' from Monday is the following Sunday, not the following Monday
-        final_end_date = start_dt.add(weeks=weeks).subtract(days=1).to_date_string()
+        start_dt = datetime.date.fromisoformat(startdate)
+        final_end_date = (start_dt + weeks * ONE_WEEK - datetime.timedelta(days=1)).isoformat()
+
+    # nothing to do if no enabled event runs on the requested days, so skip
+    # talking to wordpress at all
+    selected = {
+        key: event for day in days for key, event in enabled_events_by_day()[day].items() if not limit or key in limit
+    }
+    if not selected:
+        console.print("No enabled events on the requested days")
+        return 0
 
-    with get_session() as session:
-        _SESSION = session
+    with get_session():
         cache_events(startdate=startdate, enddate=final_end_date)
+        prefetch_lookups(selected.values())
+        # gather the events for every day first so they can be sent in full batches
+        all_events = []
+        skeletons = {}
+        queued = set()
         for day in days:
-            events_by_day(
-                api_url=f"{WORDPRESS_SERVER}{EVENT_API_BASE}/events",
-                headers=wordpress_header,
-                startdate=startdate,
-                enddate=final_end_date,
-                dryrun=dryrun,
-                update=update,
-                limit=limit,
-                day=day,
+            all_events.extend(
+                events_by_day(
+                    startdate=startdate,
+                    enddate=final_end_date,
+                    limit=limit,
+                    day=day,
+                    skeletons=skeletons,
+                    update=update,
+                    queued=queued,
+                )
             )
+        create_wordpress_events(events=all_events, dryrun=dryrun, update=update)
     return 0
 
 